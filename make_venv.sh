@@ -1,7 +1,7 @@
 #!/bin/bash
 
 DIR="${0%/*}/env"
-DEPS="clize pyspotify waitress"
+DEPS="clize orjson pyspotify waitress"
 
 echo "Making venv in $DIR"
 python3 -m venv "$DIR"
@@ -13,15 +13,15 @@ Player
 import logging
 import threading
 import collections
-import queue
 import json
 from pathlib import Path
 
 BYTES_PER_SECOND = 2 * 2 * 44100
-BLANK_500MS = b'\0' * (BYTES_PER_SECOND // 2)
+BLANK_500MS = bytes(BYTES_PER_SECOND // 2)
 TIMEOUT = 120
 
 session = None # global session
+spotify = None # pyspotify module, imported by start()
 logger = logging.getLogger(__name__)
 
 class _Error(Exception):
@@ -46,6 +46,7 @@ def start(credentials=None,
         c['appkey'] = base64.b64decode(c['appkey64'])
 
     logger.debug('loading pyspotify')
+    global spotify
     import spotify
     if disable_spotify_logging:
         logging.getLogger('spotify').setLevel(logging.WARN)
@@ -74,20 +75,18 @@ def start(credentials=None,
         raise LoginError('Failed to login after 60 seconds')
     logger.debug("logged in to spotify")
 
-class Packet: pass
+class Packet:
+    "Control message posted alongside the raw audio frames"
+    __slots__ = ()
 
-class EndPacket(Packet): pass
+class EndPacket(Packet):
+    __slots__ = ()
 
 class ErrorPacket(Packet):
+    __slots__ = ('error',)
     def __init__(self, error):
         self.error = error
 
-class MusicPacket(Packet):
-    def __init__(self, audio_format, frames, num_frames):
-        self.audio_format = audio_format
-        self.frames = frames
-        self.num_frames = num_frames
-
 class Player:
     """
     Spotify track player
@@ -109,8 +108,15 @@ class Player:
     def __init__(self, uri, maxqsize=10):
         self._playing = False
         self.track = session.get_track(uri).load() # track to play
-        self._postbox = queue.Queue()
+        self._postbox = collections.deque() # single producer/consumer
+        self._ready = threading.Event() # set when postbox may have data
         self._maxqsize = maxqsize # dont let queue grow larger than this
+        se = spotify.SessionEvent
+        self._callbacks = ((se.CONNECTION_ERROR, self.on_error),
+                           (se.STREAMING_ERROR, self.on_error),
+                           (se.MUSIC_DELIVERY, self.on_music),
+                           (se.PLAY_TOKEN_LOST, self.on_play_token_lost),
+                           (se.END_OF_TRACK, self.on_end_of_track))
 
     def _start(self):
         self._set_callbacks()
@@ -126,91 +132,97 @@ class Player:
         self._playing = False
 
     def _set_callbacks(self):
-        from spotify import SessionEvent as se
-        session.on(se.CONNECTION_ERROR, self.on_error)
-        session.on(se.STREAMING_ERROR, self.on_error)
-        session.on(se.MUSIC_DELIVERY, self.on_music)
-        session.on(se.PLAY_TOKEN_LOST, self.on_play_token_lost)
-        session.on(se.END_OF_TRACK, self.on_end_of_track)
+        for event, handler in self._callbacks:
+            session.on(event, handler)
 
     def _clear_callbacks(self):
-        from spotify import SessionEvent as se
-        session.off(se.CONNECTION_ERROR, self.on_error)
-        session.off(se.STREAMING_ERROR, self.on_error)
-        session.off(se.MUSIC_DELIVERY, self.on_music)
-        session.off(se.PLAY_TOKEN_LOST, self.on_play_token_lost)
-        session.off(se.END_OF_TRACK, self.on_end_of_track)
+        for event, handler in self._callbacks:
+            session.off(event, handler)
+
+    def _post(self, packet):
+        """Posts a packet from the spotify thread
+
+        deque appends are atomic, so we only touch the event (and its
+        lock) when the reader might be waiting for data
+        """
+        self._postbox.append(packet)
+        if not self._ready.is_set():
+            self._ready.set()
+
+    def _receive(self):
+        "Gets the next packet, waiting for the spotify thread if needed"
+        while True:
+            try:
+                return self._postbox.popleft()
+            except IndexError:
+                pass
+            if not self._ready.wait(TIMEOUT):
+                raise PlayError('Timed out waiting for data')
+            self._ready.clear()
 
     def on_end_of_track(self, session):
         "Callback when spotify has finished sending data"
         self.stop()
-        self._postbox.put(EndPacket())
+        self._post(EndPacket())
 
     def on_error(self, session, error_type):
         self.stop()
-        self._postbox.put(ErrorPacket(repr(error_type)))
+        self._post(ErrorPacket(error_type)) # PlayError will repr it
 
     def on_play_token_lost(self, session):
         self.stop()
-        self._postbox.put(ErrorPacket('Play token lost'))
+        self._post(ErrorPacket('Play token lost'))
 
     def on_music(self, session, audio_format, frames, num_frames):
         """Receives the music from spotify
 
-        Posts into the queue, and flags that data is available
+        Posts the raw frames into the queue, and flags that data is
+        available. Only control messages are wrapped in packets
         """
-        if self._postbox.qsize() > self._maxqsize:
+        if len(self._postbox) > self._maxqsize:
             return 0 # nothing consumed, try again later
 
-        self._postbox.put(MusicPacket(audio_format, frames, num_frames))
+        self._post(frames)
         return num_frames # consumed them all
 
     def get_data(self, end_after=None):
         """
         The meat of the capture
 
-        We fill a deque of data, and yield it out. This enables the
-        yielding to run one (or more if needed) packets beind the
+        We hold back the latest packet and yield the one before it.
+        This enables the yielding to run one packet behind the
         receiving. Once we have fininished, we can examine the last
-        packet(s) for the dreaded 500ms of silence that libspotify
+        packet for the dreaded 500ms of silence that libspotify
         seems to add
         """
         logger.debug('Starting playback')
         self._start()
         byte_count = 0
-        cache = collections.deque()
-        min_cache_size = 1 # to contain the last packet
-                           # but could be set higher if we want
+        end_bytes = end_after * BYTES_PER_SECOND if end_after else None
+        last = None # the packet held back
 
         while True:
-            try:
-                packet = self._postbox.get(timeout=TIMEOUT)
-            except queue.Empty:
-                raise PlayError('Timed out waiting for data')
-            if isinstance(packet, ErrorPacket):
-                raise PlayError(packet.error)
-            if isinstance(packet, EndPacket):
-                break
-            assert isinstance(packet, MusicPacket)
-            byte_count += len(packet.frames)
-            if end_after and byte_count > end_after * BYTES_PER_SECOND:
+            frames = self._receive()
+            if isinstance(frames, Packet): # rare, so only one check for audio
+                if isinstance(frames, ErrorPacket):
+                    raise PlayError(frames.error)
+                break # EndPacket
+            byte_count += len(frames)
+            if end_bytes and byte_count > end_bytes:
                 logger.debug('Stopping early as requested')
                 self.stop()
                 return
-            cache.append(packet)
-            while len(cache) > min_cache_size:
-                packet = cache.popleft()
-                yield packet.frames
-
-        # we have finished receiving, so we drain the cache, removing
-        # any padded silence
-        while len(cache):
-            packet = cache.popleft()
-            if packet.frames == BLANK_500MS:
-                logger.info('Skipping final 500ms of silence')
-                pass # do not yield it
-            else:
-                yield packet.frames
+            if last is not None:
+                yield last
+            last = frames
+
+        # we have finished receiving, so we check the last packet for
+        # padded silence. bytes equality checks the length first and
+        # stops at the first difference, so this is cheap for real audio
+        if last == BLANK_500MS:
+            logger.info('Skipping final 500ms of silence')
+        elif last is not None:
+            yield last
 
         # and that's it - all finished
         logger.debug('All packets processed')
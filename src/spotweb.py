@@ -2,11 +2,12 @@
 # std library
 #
 import logging, threading, signal
+from concurrent.futures import ThreadPoolExecutor
 
 #
 # 3rd party
 #
-import bottle, clize
+import bottle, clize, orjson
 
 #
 # local
@@ -22,8 +23,11 @@ VERSION = "2.0.3"
 #
 
 BYTES_PER_SECOND = 2 * 2 * 44100
+CHUNK_SIZE = 64 * 1024 # coalesce audio packets into writes of this size
+LOAD_WORKERS = 8 # metadata loads to run at once
 
 class Status:
+    __slots__ = ('streaming', 'streamed', 'uri', 'error', 'bytes')
     def __init__(self):
         self.streaming = self.streamed = False
         self.uri = None
@@ -35,11 +39,14 @@ class Status:
         self.error = None
         self.bytes = 0
     def to_dict(self):
-        return self.__dict__.copy()
+        return {k: getattr(self, k) for k in self.__slots__}
 
 
 app = bottle.Bottle()                # the global app
+app.uninstall(bottle.JSONPlugin)     # ... serialising with orjson
+app.install(bottle.JSONPlugin(json_dumps=orjson.dumps))
 status = Status()
+loader = ThreadPoolExecutor(LOAD_WORKERS) # shared by metadata requests
 
 def main(*, port=39705, server='waitress', debug=False):
     if debug:
@@ -74,17 +81,29 @@ def play_track(track_id):
     response = bottle.response
     response.content_type = 'audio/x-pcm'
     status.reset(uri)
+    buf = bytearray()
+    nbytes = 0 # only published to status once per chunk
     try:
         status.streaming = True
         logger.debug('streaming started')
         for data in player.get_data():
-            status.bytes += len(data)
-            yield data
+            buf += data
+            if len(buf) >= CHUNK_SIZE:
+                nbytes += len(buf)
+                status.bytes = nbytes
+                yield bytes(buf)
+                buf.clear()
+        if buf:
+            status.bytes = nbytes + len(buf)
+            yield bytes(buf)
         status.streamed = True
     except spotutil.PlayError as e:
         logger.debug('Play error received', e)
         logger.error(str(e))
         status.error = str(e)
+        if buf: # still send what we received before the error
+            status.bytes = nbytes + len(buf)
+            yield bytes(buf)
     except Exception as e:
         logger.debug('Exception received', e)
         logger.error(str(e))
@@ -105,35 +124,54 @@ def send_status():
 
 def format_album(a):
     br = a.browse()
-    br.load()
+    browsing = loader.submit(br.load)
     a.load()
-    a.artist.load()
+    loading_artist = loader.submit(a.artist.load)
+    browsing.result()
+    # loads are IO bound, so fetch the tracks and then each distinct
+    # artist concurrently before formatting them in order
+    _load_all(br.tracks)
+    track_artists = [[(str(ta.link), ta) for ta in t.artists]
+                     for t in br.tracks]
+    distinct = dict(pair for links in track_artists for pair in links)
+    _load_all(distinct.values())
+    loading_artist.result()
     tracks = []
+    artist = dict(uri=str(a.artist.link), name=a.artist.name)
     data = dict(uri=str(a.link), name=a.name, year=a.year,
-                artist=dict(uri=str(a.artist.link), name=a.artist.name),
-                tracks=tracks)
-    for t in br.tracks:
-        tracks.append(format_track(t))
+                artist=artist, tracks=tracks)
+    artist_cache = {artist['uri']: artist} # most tracks share the artist
+    for uri, ta in distinct.items():
+        if uri not in artist_cache:
+            artist_cache[uri] = dict(uri=uri, name=ta.name)
+    for t, links in zip(br.tracks, track_artists):
+        tracks.append(format_track(t, [artist_cache[uri]
+                                       for uri, _ in links]))
     return data
 
-def format_track(t):
+def format_track(t, artists=None):
     t.load()
-    artists = []
+    if artists is None:
+        artists = []
+        for ta in t.artists:
+            ta.load()
+            artists.append(dict(uri=str(ta.link), name=ta.name))
     data = dict(uri=str(t.link), name=t.name, duration=t.duration,
                 disc=t.disc, number=t.index, album=str(t.album.link),
                 artists=artists)
-    for ta in t.artists:
-        ta.load()
-        artists.append(dict(uri=str(ta.link), name=ta.name))
     return data
 
 #
 # Utilities
 #
 
+def _load_all(items):
+    "load the spotify objects using the loader pool, waiting for them all"
+    for _ in loader.map(lambda item: item.load(), items):
+        pass
+
 def _expand_uri(prefix, uri):
-    if uri.startswith(prefix): return uri
-    return prefix + uri
+    return uri if uri.startswith(prefix) else prefix + uri
 
 
 if __name__ == '__main__':